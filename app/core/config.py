@@ -8,6 +8,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 # from app.utils.crypto_sm4 import decrypt
 
 
+EnvironmentEnum = Literal["dev", "test", "prod"]
 
 
 # class MilvusSettings(BaseSettings):
@@ -65,45 +66,55 @@ class LLMSettings(BaseSettings):
     qwen3_key: str = Field(..., description="Qwen3模型Key")
 
 
-# class PathSettings(BaseSettings):
-#     # in
-#     hot_stop_word_dict: str = Field(..., description="热门知识 - 停用词词典")
-#     hot_user_dict: str = Field(..., description="热门知识 - 用户自定义分词词典")
-#     # out
-#     log_dir: Path = Field(Path("logs/"), description="日志目录")
-#     # temp
-#     audit_assignment_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="审计任务目录")
-#     docx_img_temp_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="docx图片临时目录")
-#     docx_table_temp: Path = Field(..., json_schema_extra={"path_rule": "create_file"}, description="docx表格临时文件")
-#     docx_structure_temp: Path = Field(..., json_schema_extra={"path_rule": "create_file"}, description="docx结构临时文件")
-#     upload_file_temp_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="上传文件临时存储目录")
-#     pdf2img_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="PDF转图片目录")
-#     # localdb
-#     dialogs_dir: str = Field(..., description="对话记录文件存储目录")
-#     session_files_map: str = Field(..., description="会话临时文件映射")
-#     mat_required: str = Field(..., description="任务所需材料对照表")
-#     all_mission_info: str = Field(..., description="所有初始化工作台任务的信息")
-#     all_model_info: str = Field(..., description="所有初始化工作台模型的信息")
-#     hot_knowledge_map: str = Field(..., description="热门知识 - 映射表")
-#     # ref
-#     libreoffice: Path = Field(..., json_schema_extra={"path_rule": "must_exist_dir"})
-#     model_paddleocr_rec: Path
-#     model_paddleocr_det: Path
-#     model_paddleocr_cls: Path
-#     model_embedding: Path
-#     model_reranker: Path
-#     model_tokenizer: Path
-#
-#
-# class ConstantSettings(BaseSettings):
-#     history_count_max: int = Field(2, description="历史记录条数")
-#     history_time_max: int = Field(86400, description="历史记录限时 24 * 60 * 60")
-#     recent_dial_max: int = Field(10, description="最近对话条数")
-#     task_assignment_namespace: str = Field(..., description="任务下达命名空间")
-#     hot_knowledge_loop_hours: int = Field(168, description="热门知识更新周期，单位小时")
-#     summary_leaf_chunk_size: int = Field(5000, description="待摘要文本长度")
-#     summary_size: int = Field(200, description="生成摘要长度")
-#     environment: EnvironmentEnum = Field(..., description="环境")
+class PathSettings(BaseSettings):
+    # in
+    hot_stop_word_dict: str = Field(..., description="热门知识 - 停用词词典")
+    hot_user_dict: str = Field(..., description="热门知识 - 用户自定义分词词典")
+    # out
+    log_dir: Path = Field(Path("logs/"), description="日志目录")
+    # temp
+    audit_assignment_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="审计任务目录")
+    docx_img_temp_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="docx图片临时目录")
+    docx_table_temp: Path = Field(..., json_schema_extra={"path_rule": "create_file"}, description="docx表格临时文件")
+    docx_structure_temp: Path = Field(..., json_schema_extra={"path_rule": "create_file"}, description="docx结构临时文件")
+    upload_file_temp_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="上传文件临时存储目录")
+    pdf2img_dir: Path = Field(..., json_schema_extra={"path_rule": "create_dir"}, description="PDF转图片目录")
+    doc_cache_dir: Path = Field(Path("data/doc_cache/"), json_schema_extra={"path_rule": "create_dir"}, description="文档解析结果缓存目录")
+    # localdb
+    dialogs_dir: str = Field(..., description="对话记录文件存储目录")
+    session_files_map: str = Field(..., description="会话临时文件映射")
+    mat_required: str = Field(..., description="任务所需材料对照表")
+    all_mission_info: str = Field(..., description="所有初始化工作台任务的信息")
+    all_model_info: str = Field(..., description="所有初始化工作台模型的信息")
+    hot_knowledge_map: str = Field(..., description="热门知识 - 映射表")
+    # ref
+    libreoffice: Path = Field(..., json_schema_extra={"path_rule": "must_exist_dir"})
+    model_paddleocr_rec: Path
+    model_paddleocr_det: Path
+    model_paddleocr_cls: Path
+    model_embedding: Path
+    model_reranker: Path
+    model_tokenizer: Path
+
+
+class ConstantSettings(BaseSettings):
+    history_count_max: int = Field(2, description="历史记录条数")
+    history_time_max: int = Field(86400, description="历史记录限时 24 * 60 * 60")
+    recent_dial_max: int = Field(10, description="最近对话条数")
+    history_session_cache_max: int = Field(1024, description="内存中缓存的活跃会话数")
+    history_compact_interval: int = Field(300, description="对话记录文件后台压缩间隔，单位秒")
+    task_assignment_namespace: str = Field(..., description="任务下达命名空间")
+    hot_knowledge_loop_hours: int = Field(168, description="热门知识统计窗口，单位小时")
+    hot_knowledge_top_k: int = Field(50, description="热门知识 - 热词数量")
+    hot_knowledge_snapshot_minutes: int = Field(10, description="热门知识 - 快照保存间隔，单位分钟")
+    summary_leaf_chunk_size: int = Field(5000, description="待摘要文本长度")
+    summary_size: int = Field(200, description="生成摘要长度")
+    doc_converter_workers: int = Field(2, description="常驻LibreOffice转换进程数")
+    doc_converter_base_port: int = Field(2002, description="LibreOffice转换进程起始监听端口")
+    doc_convert_timeout: int = Field(120, description="单个文档转换超时时间，单位秒")
+    doc_ocr_workers: int = Field(4, description="OCR进程数")
+    doc_ocr_dpi: int = Field(200, description="PDF页面渲染DPI")
+    environment: EnvironmentEnum = Field(..., description="环境")
 
 
 class AppSettings(BaseSettings):
@@ -126,8 +137,8 @@ class AppSettings(BaseSettings):
     # mysql: MysqlSettings
     llm: LLMSettings
     # url: UrlSettings
-    # path: PathSettings
-    # constant: ConstantSettings
+    path: PathSettings
+    constant: ConstantSettings
     # vector_model_service: VectorModelServiceSettings
 
     # sm4_cbc: str = ""
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+
+
+class PageResult(BaseModel):
+    """单页文档的OCR结果"""
+    page_no: int = Field(..., description="页码，从0开始")
+    lines: list[str] = Field(default_factory=list, description="按识别顺序排列的文本行")
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
@@ -0,0 +1,217 @@
+"""
+LibreOffice 常驻转换进程池
+
+启动若干个监听不同端口的 headless soffice 进程，通过 UNO 接口转换文档，
+避免每个文件都重新启动 LibreOffice。
+uno 模块仅存在于 LibreOffice 自带的 Python 或 python3-uno 中，只在启动转换进程时导入，
+未安装时仍可处理 PDF 和图片。
+"""
+import asyncio
+import logging
+import subprocess
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 按文件类型选择 PDF 导出过滤器
+PDF_EXPORT_FILTERS = {
+    ".doc": "writer_pdf_Export",
+    ".docx": "writer_pdf_Export",
+    ".wps": "writer_pdf_Export",
+    ".rtf": "writer_pdf_Export",
+    ".odt": "writer_pdf_Export",
+    ".txt": "writer_pdf_Export",
+    ".xls": "calc_pdf_Export",
+    ".xlsx": "calc_pdf_Export",
+    ".et": "calc_pdf_Export",
+    ".ods": "calc_pdf_Export",
+    ".ppt": "impress_pdf_Export",
+    ".pptx": "impress_pdf_Export",
+    ".dps": "impress_pdf_Export",
+    ".odp": "impress_pdf_Export",
+}
+
+
+def _props(**kwargs) -> tuple:
+    from com.sun.star.beans import PropertyValue
+
+    props = []
+    for name, value in kwargs.items():
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        props.append(prop)
+    return tuple(props)
+
+
+class _OfficeWorker:
+    """一个常驻的 soffice 进程及其 UNO 连接"""
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self._profile_dir = settings.path.upload_file_temp_dir / f"lo_profile_{index}"
+        self._proc: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    def start(self, timeout: float = 30) -> None:
+        import uno
+
+        self._proc = subprocess.Popen(
+            [
+                str(settings.path.libreoffice),
+                "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+                f"-env:UserInstallation={self._profile_dir.resolve().as_uri()}",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local_ctx)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                ctx = resolver.resolve(f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if self._proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice 进程启动失败，端口: {self.port}")
+                time.sleep(0.5)
+        self._desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+        logger.info(f"LibreOffice 转换进程 {self.index} 已就绪，端口: {self.port}")
+
+    def stop(self) -> None:
+        self._desktop = None
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        self._proc = None
+
+    def kill(self) -> None:
+        """强制结束进程，用于转换卡死时中断阻塞中的 UNO 调用。"""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+
+    def restart(self) -> None:
+        logger.warning(f"重启 LibreOffice 转换进程 {self.index}")
+        self.stop()
+        self.start()
+
+    def convert(self, src: Path, dst: Path) -> None:
+        import uno
+
+        if self._proc is None or self._proc.poll() is not None:
+            self.restart()
+        doc = self._desktop.loadComponentFromURL(uno.systemPathToFileUrl(str(src.resolve())), "_blank", 0, _props(Hidden=True))
+        if doc is None:
+            raise ValueError(f"LibreOffice 无法打开文件: {src}")
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(str(dst.resolve())), _props(FilterName=PDF_EXPORT_FILTERS[src.suffix.lower()]))
+        finally:
+            doc.close(True)
+
+
+class OfficeConverterPool:
+    """
+    LibreOffice 转换进程池。
+    每个进程同一时间只处理一个文件，UNO 调用在线程中执行，不阻塞事件循环。
+    """
+    def __init__(
+        self,
+        size: int = settings.constant.doc_converter_workers,
+        base_port: int = settings.constant.doc_converter_base_port,
+        timeout: int = settings.constant.doc_convert_timeout,
+    ):
+        self._workers = [_OfficeWorker(i, base_port + i) for i in range(size)]
+        self._timeout = timeout
+        self._idle: asyncio.Queue[_OfficeWorker] = asyncio.Queue()
+        self.available = False
+
+    async def start(self) -> None:
+        try:
+            import uno  # noqa: F401
+        except ImportError:
+            logger.warning("当前 Python 环境缺少 uno 模块，办公文档转换不可用，仅支持 PDF 和图片。")
+            return
+        results = await asyncio.gather(
+            *(asyncio.to_thread(worker.start) for worker in self._workers),
+            return_exceptions=True,
+        )
+        healthy = []
+        for worker, result in zip(self._workers, results):
+            if isinstance(result, BaseException):
+                logger.error(f"LibreOffice 转换进程 {worker.index} 启动失败: {result}")
+                await asyncio.to_thread(worker.stop)
+            else:
+                healthy.append(worker)
+        # 只保留启动成功的进程，全部失败时与缺少 uno 一样降级
+        self._workers = healthy
+        if not healthy:
+            logger.warning("没有可用的 LibreOffice 转换进程，办公文档转换不可用，仅支持 PDF 和图片。")
+            return
+        for worker in healthy:
+            self._idle.put_nowait(worker)
+        self.available = True
+
+    async def close(self) -> None:
+        if self.available:
+            await asyncio.gather(*(asyncio.to_thread(worker.stop) for worker in self._workers))
+            self.available = False
+
+    @staticmethod
+    def supports(path: Path) -> bool:
+        return path.suffix.lower() in PDF_EXPORT_FILTERS
+
+    async def to_pdf(self, src: Path) -> bytes:
+        """
+        将办公文档转换为PDF并返回其字节内容。
+
+        Args:
+            src (Path): 源文件路径
+
+        Returns:
+            bytes: PDF文件内容
+        """
+        if not self.available:
+            raise ValueError(f"办公文档转换不可用: {src.name}")
+        dst = settings.path.upload_file_temp_dir / f"{uuid.uuid4().hex}.pdf"
+        worker = await self._idle.get()
+        try:
+            try:
+                await self._convert(worker, src, dst)
+            except ValueError:
+                raise
+            except Exception as e:
+                # UNO 连接断开等情况，重启进程后重试一次
+                logger.error(f"LibreOffice 转换失败，准备重试: {src}, {e}", exc_info=True)
+                await asyncio.to_thread(worker.restart)
+                await self._convert(worker, src, dst)
+            return await asyncio.to_thread(dst.read_bytes)
+        finally:
+            self._idle.put_nowait(worker)
+            dst.unlink(missing_ok=True)
+
+    async def _convert(self, worker: _OfficeWorker, src: Path, dst: Path) -> None:
+        """
+        带超时的转换。超时说明文件使 LibreOffice 卡死，结束并重启该进程后放弃此文件。
+        """
+        try:
+            await asyncio.wait_for(asyncio.to_thread(worker.convert, src, dst), self._timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"LibreOffice 转换超时（{self._timeout}秒），重启转换进程 {worker.index}: {src}")
+            worker.kill()
+            try:
+                await asyncio.to_thread(worker.restart)
+            except Exception as e:
+                # 下次转换时会再次尝试启动
+                logger.error(f"LibreOffice 转换进程 {worker.index} 重启失败: {e}", exc_info=True)
+            raise ValueError(f"LibreOffice 转换超时: {src.name}")
@@ -0,0 +1,154 @@
+"""
+文档处理引擎
+
+上传文档 -> (LibreOffice) PDF -> 页面图像 -> OCR，按页流式返回结果。
+同一内容的文件以哈希（含DPI、模型等处理参数）为键缓存结果，重复上传时直接返回。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+import fitz
+
+from app.core.config import settings
+from app.schemas.document.base import PageResult
+from app.services.document.converter import OfficeConverterPool
+from app.services.document.ocr import OCRPool
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+# 渲染或识别逻辑变化时递增，使旧缓存失效
+PIPELINE_VERSION = 1
+
+
+class DocumentEngine:
+    """
+    文档处理引擎。
+    应用启动时调用 start()，关闭时调用 close()。
+    """
+    def __init__(
+        self,
+        converter: Optional[OfficeConverterPool] = None,
+        ocr: Optional[OCRPool] = None,
+        cache_dir: str | Path = settings.path.doc_cache_dir,
+        dpi: int = settings.constant.doc_ocr_dpi,
+    ):
+        self._converter = converter or OfficeConverterPool()
+        self._ocr = ocr or OCRPool()
+        self._cache_dir = Path(cache_dir)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._dpi = dpi
+        # 缓存键除文件内容外还包含影响结果的参数：流水线版本、DPI、OCR模型
+        self._cache_salt = "|".join((
+            str(PIPELINE_VERSION),
+            str(dpi),
+            str(settings.path.model_paddleocr_det),
+            str(settings.path.model_paddleocr_rec),
+            str(settings.path.model_paddleocr_cls),
+        )).encode("utf-8")
+        # 同时在途的页面数，保证OCR进程不空闲且内存中的页面图像有上限
+        self._window = self._ocr.size * 2
+
+    async def start(self) -> None:
+        self._ocr.start()
+        await self._converter.start()
+
+    async def close(self) -> None:
+        await self._converter.close()
+        await asyncio.to_thread(self._ocr.close)
+
+    # ---------------- 缓存 ----------------
+
+    def _cache_path(self, digest: str) -> Path:
+        return self._cache_dir / f"{digest}.json"
+
+    def _load_cache(self, digest: str) -> Optional[list[list[str]]]:
+        path = self._cache_path(digest)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            logger.warning(f"文档缓存损坏，重新处理: {path}")
+            return None
+
+    def _save_cache(self, digest: str, pages: list[list[str]]) -> None:
+        path = self._cache_path(digest)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(pages, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+
+    # ---------------- 页面渲染 ----------------
+
+    def _render_page(self, doc: fitz.Document, page_no: int) -> tuple[bytes, tuple[int, int, int]]:
+        pix = doc[page_no].get_pixmap(dpi=self._dpi, colorspace=fitz.csRGB, alpha=False)
+        return pix.samples, (pix.height, pix.width, pix.n)
+
+    async def _ocr_pdf(self, pdf_bytes: bytes) -> AsyncGenerator[list[str], None]:
+        """
+        逐页渲染PDF并提交OCR，按页码顺序返回结果，最多 self._window 页同时在途。
+        """
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        in_flight: deque[asyncio.Future] = deque()
+        try:
+            for page_no in range(doc.page_count):
+                if len(in_flight) >= self._window:
+                    yield await in_flight.popleft()
+                # fitz 文档对象不是线程安全的，渲染在事件循环线程外串行执行
+                samples, shape = await asyncio.to_thread(self._render_page, doc, page_no)
+                in_flight.append(self._ocr.recognize(samples, shape))
+            while in_flight:
+                yield await in_flight.popleft()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            doc.close()
+
+    # ---------------- 入口 ----------------
+
+    async def process(self, path: str | Path) -> AsyncGenerator[PageResult, None]:
+        """
+        处理单个文件，按页流式返回OCR结果。
+
+        Args:
+            path (str | Path): 上传文件路径，支持PDF、图片及LibreOffice可转换的办公文档
+
+        Yields:
+            PageResult: 单页识别结果
+        """
+        path = Path(path)
+        suffix = path.suffix.lower()
+        if suffix != ".pdf" and suffix not in IMAGE_SUFFIXES:
+            if not self._converter.supports(path):
+                raise ValueError(f"不支持的文件类型: {path.name}")
+            if not self._converter.available:
+                raise ValueError(f"办公文档转换不可用，无法处理: {path.name}")
+
+        data = await asyncio.to_thread(path.read_bytes)
+        digest = hashlib.sha256(self._cache_salt + b"\0" + data).hexdigest()
+        cached = await asyncio.to_thread(self._load_cache, digest)
+        if cached is not None:
+            logger.info(f"命中文档缓存: {path.name}")
+            for page_no, lines in enumerate(cached):
+                yield PageResult(page_no=page_no, lines=lines)
+            return
+
+        logger.info(f"开始处理文档: {path.name}")
+        pages: list[list[str]] = []
+        if suffix in IMAGE_SUFFIXES:
+            lines = await self._ocr.recognize(data)
+            pages.append(lines)
+            yield PageResult(page_no=0, lines=lines)
+        else:
+            pdf_bytes = data if suffix == ".pdf" else await self._converter.to_pdf(path)
+            async for lines in self._ocr_pdf(pdf_bytes):
+                yield PageResult(page_no=len(pages), lines=lines)
+                pages.append(lines)
+
+        await asyncio.to_thread(self._save_cache, digest, pages)
+        logger.info(f"文档处理完成: {path.name}，共 {len(pages)} 页")
@@ -0,0 +1,90 @@
+"""
+多进程 OCR
+
+每个工作进程在初始化时加载一次 PaddleOCR 模型，页面图像以内存字节的形式传入。
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的 PaddleOCR 实例，由 _init_worker 创建
+_OCR = None
+
+
+def _init_worker(det_model_dir: str, rec_model_dir: str, cls_model_dir: str) -> None:
+    global _OCR
+    from paddleocr import PaddleOCR
+
+    _OCR = PaddleOCR(
+        det_model_dir=det_model_dir,
+        rec_model_dir=rec_model_dir,
+        cls_model_dir=cls_model_dir,
+        use_angle_cls=True,
+        show_log=False,
+    )
+
+
+def _recognize(data: bytes, shape: Optional[tuple[int, int, int]]) -> list[str]:
+    """
+    在工作进程中识别单页图像。
+
+    Args:
+        data (bytes): shape 不为空时为RGB像素数据，否则为编码后的图片文件内容
+        shape (Optional[tuple[int, int, int]]): 像素数据的 (高, 宽, 通道数)
+
+    Returns:
+        list[str]: 识别出的文本行
+    """
+    if shape is None:
+        import cv2
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    else:
+        # PaddleOCR 按 BGR 处理图像；复制为连续可写数组，部分预处理会原地修改图像
+        image = np.ascontiguousarray(np.frombuffer(data, dtype=np.uint8).reshape(shape)[:, :, ::-1])
+    result = _OCR.ocr(image, cls=True)
+    if not result or not result[0]:
+        return []
+    return [line[1][0] for line in result[0]]
+
+
+class OCRPool:
+    """
+    OCR 进程池。
+    """
+    def __init__(self, size: int = settings.constant.doc_ocr_workers):
+        self.size = size
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        logger.info(f"正在启动 {self.size} 个 OCR 进程...")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.size,
+            # 主进程此时已有多个线程，fork 可能使子进程死锁；模型在 initializer 中加载，spawn 不丢失状态
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                str(settings.path.model_paddleocr_det),
+                str(settings.path.model_paddleocr_rec),
+                str(settings.path.model_paddleocr_cls),
+            ),
+        )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def recognize(self, data: bytes, shape: Optional[tuple[int, int, int]] = None) -> asyncio.Future:
+        """
+        提交单页图像，返回可等待的识别结果（文本行列表）。
+        """
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, _recognize, data, shape)
@@ -0,0 +1,263 @@
+"""
+热门知识增量统计
+
+分词词典只在启动时加载一次，每条新对话到达时即分词计数。
+词频按小时分桶，滑动窗口外的桶整体淘汰；热词通过堆取 top-k，随时可查。
+"""
+import asyncio
+import heapq
+import json
+import logging
+import time
+from collections import Counter, deque
+from operator import itemgetter
+from pathlib import Path
+from typing import Optional
+
+import jieba
+
+from app.core.config import settings
+from app.services.session.history_store import ARCHIVE_DIR_NAME, DialogTurn
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 3600
+
+
+class HotKnowledgeEngine:
+    """
+    热门知识统计引擎。
+    """
+    def __init__(
+        self,
+        stop_word_dict: str | Path = settings.path.hot_stop_word_dict,
+        user_dict: str | Path = settings.path.hot_user_dict,
+        map_path: str | Path = settings.path.hot_knowledge_map,
+        dialogs_dir: str | Path = settings.path.dialogs_dir,
+        window_hours: int = settings.constant.hot_knowledge_loop_hours,
+        top_k: int = settings.constant.hot_knowledge_top_k,
+        snapshot_minutes: int = settings.constant.hot_knowledge_snapshot_minutes,
+    ):
+        self._stop_words = self._load_stop_words(Path(stop_word_dict))
+        self._tokenizer = jieba.Tokenizer()
+        if Path(user_dict).exists():
+            self._tokenizer.load_userdict(str(user_dict))
+        self._tokenizer.initialize()
+
+        self._map_path = Path(map_path)
+        self._dialogs_dir = Path(dialogs_dir)
+        self._snapshot_path = self._map_path.with_suffix(".snapshot.json")
+        self._window_buckets = window_hours * 3600 // BUCKET_SECONDS
+        self._top_k = top_k
+        self._snapshot_interval = snapshot_minutes * 60
+
+        # (桶编号, 该桶内的词频)，按桶编号递增排列
+        self._buckets: deque[tuple[int, Counter]] = deque()
+        self._totals: Counter = Counter()
+        self._version = 0
+        self._top_cache: tuple[int, int, list[tuple[str, int]]] = (-1, 0, [])
+        self._saved_version = 0
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._seed_task: Optional[asyncio.Task] = None
+
+        self._need_seed = not self._load_snapshot()
+
+    @staticmethod
+    def _load_stop_words(path: Path) -> frozenset[str]:
+        if not path.exists():
+            logger.warning(f"停用词词典不存在: {path}")
+            return frozenset()
+        with path.open("r", encoding="utf-8") as f:
+            return frozenset(line.strip() for line in f if line.strip())
+
+    # ---------------- 分词与计数 ----------------
+
+    def _tokenize(self, text: str) -> Counter:
+        return Counter(
+            word for word in self._tokenizer.lcut(text)
+            if len(word) > 1 and word not in self._stop_words and not word.isdigit() and not word.isspace()
+        )
+
+    def _bucket_for(self, bucket_id: int) -> Counter:
+        buckets = self._buckets
+        if not buckets or buckets[-1][0] < bucket_id:
+            buckets.append((bucket_id, Counter()))
+            return buckets[-1][1]
+        # 时间戳早于最新桶（如补录历史对话），从新到旧查找插入位置
+        for i in range(len(buckets) - 1, -1, -1):
+            existing_id, counts = buckets[i]
+            if existing_id == bucket_id:
+                return counts
+            if existing_id < bucket_id:
+                break
+        else:
+            i = -1
+        counts = Counter()
+        buckets.insert(i + 1, (bucket_id, counts))
+        return counts
+
+    def _expire(self, now: float) -> None:
+        """淘汰窗口外的桶，每个词的计数在淘汰时只被扣减一次。"""
+        oldest = int(now // BUCKET_SECONDS) - self._window_buckets
+        buckets = self._buckets
+        totals = self._totals
+        while buckets and buckets[0][0] <= oldest:
+            _, counts = buckets.popleft()
+            for word, count in counts.items():
+                remain = totals[word] - count
+                if remain > 0:
+                    totals[word] = remain
+                else:
+                    del totals[word]
+            self._version += 1
+
+    def _count(self, words: Counter, ts: float) -> None:
+        now = time.time()
+        self._expire(now)
+        bucket_id = int(ts // BUCKET_SECONDS)
+        if bucket_id <= int(now // BUCKET_SECONDS) - self._window_buckets:
+            return
+        self._bucket_for(bucket_id).update(words)
+        self._totals.update(words)
+        self._version += 1
+
+    async def feed(self, text: str, ts: Optional[float] = None) -> None:
+        """
+        统计一条新对话。分词在线程中执行，计数在事件循环线程中完成。
+        """
+        if not text:
+            return
+        words = await asyncio.to_thread(self._tokenize, text)
+        if words:
+            self._count(words, ts if ts is not None else time.time())
+
+    async def on_dialog(self, turn: DialogTurn) -> None:
+        """作为 SessionHistoryStore 的 on_append 回调，统计用户提问。"""
+        await self.feed(turn.question, turn.ts)
+
+    # ---------------- 查询 ----------------
+
+    def hot_terms(self, k: Optional[int] = None) -> list[tuple[str, int]]:
+        """
+        获取当前窗口内的 top-k 热词及其出现次数，数据未变化时直接返回缓存结果。
+        """
+        k = k or self._top_k
+        self._expire(time.time())
+        version, cached_k, cached = self._top_cache
+        if version == self._version and cached_k >= k:
+            return cached[:k]
+        top = heapq.nlargest(k, self._totals.items(), key=itemgetter(1))
+        self._top_cache = (self._version, k, top)
+        return top
+
+    def hot_knowledge_map(self) -> dict[str, int]:
+        """获取热门知识映射表：热词 -> 出现次数，按热度降序。"""
+        return dict(self.hot_terms())
+
+    # ---------------- 快照 ----------------
+
+    def _load_snapshot(self) -> bool:
+        """从快照恢复分桶计数，快照不存在或损坏时返回 False。"""
+        if not self._snapshot_path.exists():
+            return False
+        try:
+            data = json.loads(self._snapshot_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            logger.warning(f"热门知识快照损坏，忽略: {self._snapshot_path}")
+            return False
+        for bucket_id, counts in sorted(data.get("buckets", []), key=itemgetter(0)):
+            counter = Counter(counts)
+            self._buckets.append((bucket_id, counter))
+            self._totals.update(counter)
+        self._expire(time.time())
+        self._saved_version = self._version
+        logger.info(f"已从快照恢复热门知识统计，共 {len(self._totals)} 个词。")
+        return True
+
+    def _tokenize_dialog_logs(self, since: float, until: float) -> list[tuple[float, Counter]]:
+        """
+        读取 [since, until) 内的用户提问并分词。
+        会话日志只保留最近几轮，更早的记录在压缩时转入归档目录，两处合起来才是完整的对话记录。
+        """
+        results = []
+        paths = [*self._dialogs_dir.glob("*.jsonl"), *(self._dialogs_dir / ARCHIVE_DIR_NAME).glob("*.jsonl")]
+        for path in paths:
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            ts, question, _ = json.loads(line)
+                        except (json.JSONDecodeError, TypeError, ValueError):
+                            continue
+                        if since <= ts < until and question:
+                            words = self._tokenize(question)
+                            if words:
+                                results.append((ts, words))
+            except OSError as e:
+                logger.warning(f"读取对话记录失败: {path}, {e}")
+        return results
+
+    async def seed_from_dialogs(self, until: Optional[float] = None) -> None:
+        """
+        首次启动且没有快照时，按每轮对话的时间戳用已有对话记录填充统计窗口，并立即保存快照。
+        """
+        # 只读取 until 之前的记录，之后到达的对话已通过 feed 实时统计
+        until = until if until is not None else time.time()
+        since = until - self._window_buckets * BUCKET_SECONDS
+        logger.info(f"未找到热门知识快照，正在从对话记录初始化: {self._dialogs_dir}")
+        for ts, words in await asyncio.to_thread(self._tokenize_dialog_logs, since, until):
+            self._count(words, ts)
+        self._need_seed = False  # 必须在 save_snapshot 之前置为 False
+        await self.save_snapshot()
+        logger.info(f"热门知识统计初始化完成，共 {len(self._totals)} 个词。")
+
+    def _write_files(self, buckets: list, hot_map: dict[str, int]) -> None:
+        self._snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        for path, obj in ((self._snapshot_path, {"buckets": buckets}), (self._map_path, hot_map)):
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(obj, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(path)
+
+    async def save_snapshot(self) -> None:
+        """
+        保存分桶计数快照，并同步写出热门知识映射表文件。
+        初始化完成前不保存，否则中途退出会留下不完整的快照，且下次启动不再初始化。
+        """
+        if self._need_seed or self._version == self._saved_version:
+            return
+        version = self._version
+        buckets = [[bucket_id, dict(counts)] for bucket_id, counts in self._buckets]
+        await asyncio.to_thread(self._write_files, buckets, self.hot_knowledge_map())
+        self._saved_version = version
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._snapshot_interval)
+            try:
+                await self.save_snapshot()
+            except Exception as e:
+                logger.error(f"保存热门知识快照时发生错误: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """启动后台快照任务，没有快照时同时从对话记录初始化，需在事件循环中调用。"""
+        if self._need_seed and self._seed_task is None:
+            self._seed_task = asyncio.create_task(self.seed_from_dialogs(until=time.time()))
+        if self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def close(self) -> None:
+        """停止后台任务并保存最后一次快照。"""
+        if self._seed_task is not None:
+            try:
+                await self._seed_task
+            except Exception as e:
+                logger.error(f"从对话记录初始化热门知识失败: {e}", exc_info=True)
+            self._seed_task = None
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+        await self.save_snapshot()
@@ -5,6 +5,7 @@ from typing import Any, Optional
 
 from app.core.config import settings
 from app.services.llmapi.base import BaseLLMClient
+from app.services.llmapi.payload import build_payload
 from app.schemas.llmapi.base import ChatMessage, LLMResponse, StreamChunk
 
 logger = logging.getLogger(__name__)
@@ -13,10 +14,9 @@ class Qwen3LLMClient(BaseLLMClient):
     """信通人工智能平台大模型客户端"""
 
     # ----------------- 修改 --------------------
-    def _add_thinking_flag(self, model_name: str, messages: list[ChatMessage]) -> list[ChatMessage]:
-        if model_name != "deepseek" and messages:
-            messages[-1].content += " /no_think"
-        return messages
+    def _thinking_flag(self, model_name: str) -> str:
+        # 追加到最后一条消息的标记，在序列化时拼接，不修改调用方的消息对象
+        return "" if model_name == "deepseek" else " /no_think"
         # return settings.LLM_THINKING_MODEL if model_name == "deepseek" else settings.LLM_INSTRUCT_MODEL
     # ----------------- 修改 --------------------
 
@@ -27,11 +27,8 @@ class Qwen3LLMClient(BaseLLMClient):
         stream: bool,
         **kwargs: Any
     ) -> httpx.Request:
-        messages = self._add_thinking_flag(model_name, messages)
-        
         payload = {
             "model": settings.llm.qwen3_model,   # 修改
-            "messages": [msg.model_dump() for msg in messages],
             "stream": stream,
             "enable_thinking": False
         }
@@ -48,7 +45,8 @@ class Qwen3LLMClient(BaseLLMClient):
             "Authorization": f"Bearer {settings.llm.qwen3_key}",
         }
 
-        return httpx.Request("POST", settings.llm.qwen3_url, json=payload, headers=headers)
+        content = build_payload(payload, messages, last_suffix=self._thinking_flag(model_name))
+        return httpx.Request("POST", settings.llm.qwen3_url, content=content, headers=headers)
 
     # ----------------- 修改 --------------------+9+96
     async def _parse_response(self, response: httpx.Response) -> LLMResponse:
@@ -1,13 +1,13 @@
 import abc
-import json
 import logging
 import uuid
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 
 import httpx
 
 from app.schemas.llmapi.base import ChatMessage, LLMResponse, StreamChunk
-from app.core.context_logger import REQUEST_ID_VAR
+from app.core.context_logger import REQUEST_ID_VAR, SESSION_ID_VAR
+from app.services.session.history_store import SessionHistoryStore
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +17,9 @@ class BaseLLMClient(abc.ABC):
     所有LLM客户端的抽象基类。
     定义了统一的接口和基于httpx的异步网络I/O。
     """
-    def __init__(self, client: httpx.AsyncClient):
+    def __init__(self, client: httpx.AsyncClient, history_store: Optional[SessionHistoryStore] = None):
         self._client = client
+        self._history_store = history_store
 
     @abc.abstractmethod
     def _prepare_request(
@@ -82,10 +83,8 @@ class BaseLLMClient(abc.ABC):
         """
         [通用逻辑] 发送流式请求并逐块返回解析后的响应。
         """
-        request_content_str = request.content.decode("utf-8")
-        request_content_json = json.loads(request_content_str)
         try:
-            async with self._client.stream(request.method, request.url, headers=request.headers, json=request_content_json, timeout=120) as response:
+            async with self._client.stream(request.method, request.url, headers=request.headers, content=request.content, timeout=120) as response:
                 response.raise_for_status()
                 async for line in response.aiter_lines():
                     if line and line.startswith("data:"):
@@ -100,6 +99,38 @@ class BaseLLMClient(abc.ABC):
             logger.error(f"处理LLM流式响应时发生错误: {e}", exc_info=True)
             raise
 
+    async def _record_stream(
+        self,
+        stream: AsyncGenerator[StreamChunk, None],
+        prompt: str,
+        session_id: str
+    ) -> AsyncGenerator[StreamChunk, None]:
+        """
+        [通用逻辑] 透传流式响应，并将本轮对话写入会话历史。
+        结束块交付后即记录；若流提前中断（如客户端断开），记录已收到的部分回答。
+        """
+        answer_parts = []
+        recorded = False
+
+        async def record() -> None:
+            nonlocal recorded
+            recorded = True
+            _, answer = self._extract_think_answer("".join(answer_parts))
+            await self._history_store.append(prompt, answer, session_id=session_id)
+
+        try:
+            async for chunk in stream:
+                if not chunk.is_thinking:
+                    answer_parts.append(chunk.content)
+                yield chunk
+                if chunk.is_final and not recorded:
+                    # 先交付结束块再记录，避免结束块等待历史记录的磁盘IO
+                    await record()
+        finally:
+            if not recorded and answer_parts:
+                logger.warning("LLM流式响应未正常结束，记录已收到的部分回答。")
+                await record()
+
     async def chat(
         self,
         prompt: str,
@@ -110,20 +141,29 @@ class BaseLLMClient(abc.ABC):
     ) -> LLMResponse | AsyncGenerator[StreamChunk, None]:
         """
         统一的调用入口。
+        未传入 history 且配置了会话历史存储时，自动取用当前会话的最近对话，并在完成后记录本轮对话。
         """
         request_id = str(uuid.uuid4())
         request_id_token = REQUEST_ID_VAR.set(request_id)
         logger.info(f"开始处理LLM请求。")
         try:
-            # 构建消息列表
-            messages = history or []
-            messages.append(ChatMessage(role="user", content=prompt))
+            session_id = SESSION_ID_VAR.get()
+            record = self._history_store is not None and session_id is not None
+            if history is None and record:
+                history = await self._history_store.get_history(session_id=session_id)
+            # 构建消息列表，不修改调用方传入的history
+            messages = [*(history or []), ChatMessage(role="user", content=prompt)]
             # 准备请求参数
             request = self._prepare_request(messages, model_name, stream, **kwargs)
             if stream:
-                return self._get_stream_response(request)
+                stream_response = self._get_stream_response(request)
+                if record:
+                    return self._record_stream(stream_response, prompt, session_id)
+                return stream_response
             else:
                 response = await self._get_response(request)
+                if record:
+                    await self._history_store.append(prompt, response.answer, session_id=session_id)
 
                 logger.info("成功完成LLM非流式请求。")
                 return response
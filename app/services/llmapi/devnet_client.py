@@ -9,6 +9,7 @@ from typing import Any, Optional
 
 from app.core.config import settings
 from app.services.llmapi.base import BaseLLMClient
+from app.services.llmapi.payload import build_payload
 from app.schemas.llmapi.base import ChatMessage, LLMResponse, StreamChunk
 
 logger = logging.getLogger(__name__)
@@ -47,7 +48,6 @@ class DevnetLLMClient(BaseLLMClient):
         model, url = self._get_model_info(model_name)
         payload = {
             "model": model,
-            "messages": [msg.model_dump() for msg in messages],
             "stream": stream,
             "top_p": kwargs.get("top_p", settings.llm.default_top_p)
         }
@@ -56,7 +56,8 @@ class DevnetLLMClient(BaseLLMClient):
         if kwargs.get("max_tokens"):
             payload["max_tokens"] = kwargs.get("max_tokens")
 
-        return httpx.Request("POST", url, json=payload, headers={"Content-Type": "application/json"})
+        content = build_payload(payload, messages)
+        return httpx.Request("POST", url, content=content, headers={"Content-Type": "application/json"})
 
     async def _parse_response(self, response: httpx.Response) -> LLMResponse:
         """
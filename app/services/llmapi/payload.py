@@ -0,0 +1,76 @@
+"""
+请求体构建工具
+
+以 (role, content) 为键缓存每条消息序列化后的JSON字节，组装请求体时直接拼接，
+多轮对话中未变化的历史消息不再重复序列化。缓存按总大小淘汰，过长的消息不缓存。
+"""
+import json
+from collections import OrderedDict
+from typing import Any
+
+from app.schemas.llmapi.base import ChatMessage
+
+_CACHE_MAX_BYTES = 16 * 1024 * 1024  # 缓存总大小上限
+_CACHE_ENTRY_MAX_CHARS = 8192         # 超过该长度的消息（如携带文档/检索上下文的提示词）不缓存
+
+_message_cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+_message_cache_bytes = 0
+
+
+def _dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _entry_size(content: str, encoded: bytes) -> int:
+    # 粗略估算：content 按每字符最多4字节，加上编码后的字节
+    return len(content) * 4 + len(encoded)
+
+
+def _encode_message(role: str, content: str) -> bytes:
+    global _message_cache_bytes
+    if len(content) > _CACHE_ENTRY_MAX_CHARS:
+        return _dumps({"role": role, "content": content})
+
+    # str 对象会缓存自身的哈希值，同一条历史消息再次命中缓存的开销为 O(1)
+    key = (role, content)
+    encoded = _message_cache.get(key)
+    if encoded is not None:
+        _message_cache.move_to_end(key)
+        return encoded
+
+    encoded = _dumps({"role": role, "content": content})
+    _message_cache[key] = encoded
+    _message_cache_bytes += _entry_size(content, encoded)
+    while _message_cache_bytes > _CACHE_MAX_BYTES:
+        (_, old_content), old_encoded = _message_cache.popitem(last=False)
+        _message_cache_bytes -= _entry_size(old_content, old_encoded)
+    return encoded
+
+
+def encode_message(message: ChatMessage, suffix: str = "") -> bytes:
+    """
+    获取单条消息的JSON字节。suffix 追加到 content 末尾，不修改原消息对象。
+    """
+    if suffix:
+        return _dumps({"role": message.role, "content": message.content + suffix})
+    return _encode_message(message.role, message.content)
+
+
+def build_payload(fields: dict[str, Any], messages: list[ChatMessage], last_suffix: str = "") -> bytes:
+    """
+    组装请求体字节：fields 为除 messages 外的其他字段，messages 由缓存的字节拼接而成。
+
+    Args:
+        fields (dict[str, Any]): 模型名、stream、采样参数等字段
+        messages (list[ChatMessage]): 对话消息列表
+        last_suffix (str): 追加到最后一条消息 content 的后缀，如 " /no_think"
+
+    Returns:
+        bytes: 可直接作为 httpx 请求 content 的JSON字节
+    """
+    parts = [encode_message(msg) for msg in messages[:-1]]
+    if messages:
+        parts.append(encode_message(messages[-1], last_suffix))
+    head = _dumps(fields)[:-1]  # 去掉结尾的 "}"
+    sep = b"," if fields else b""
+    return b"".join((head, sep, b'"messages":[', b",".join(parts), b"]}"))
@@ -0,0 +1,133 @@
+"""
+审计前端流式输出适配
+
+将上游的 StreamChunk 合并为 AuditStreamChunk 帧并直接编码为SSE字节。
+连续且 is_think 相同的增量会被合并，满足以下任一条件时输出一帧：
+缓冲字节数达到阈值、距首个缓冲增量超过时限、思考/回答切换、流结束。
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncGenerator
+
+from app.schemas.llmapi.base import StreamChunk
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BYTES = 512     # 缓冲达到该字节数立即输出
+FLUSH_DELAY = 0.05    # 缓冲最长停留时间，单位秒
+
+
+class AuditFrameEncoder:
+    """
+    预编码 AuditStreamChunk 帧，输出与按别名序列化的 AuditStreamChunk 一致。
+    每帧只需序列化 streamMessage 字符串本身。
+    """
+    def __init__(self, stream_message_id: int):
+        self._prefix = f'data: {{"streamMessageId":{int(stream_message_id)},"streamMessage":'.encode("utf-8")
+        self._suffixes = {
+            (is_think, end_stream): f',"isThink":"{is_think}","endStream":{"true" if end_stream else "false"}}}\n\n'.encode("utf-8")
+            for is_think in ("0", "1")
+            for end_stream in (False, True)
+        }
+
+    def encode(self, message: str, is_think: bool, end_stream: bool = False) -> bytes:
+        return b"".join((
+            self._prefix,
+            json.dumps(message, ensure_ascii=False).encode("utf-8"),
+            self._suffixes[("1" if is_think else "0", end_stream)],
+        ))
+
+
+async def coalesce_audit_stream(
+    stream: AsyncGenerator[StreamChunk, None],
+    stream_message_id: int,
+    flush_bytes: int = FLUSH_BYTES,
+    flush_delay: float = FLUSH_DELAY,
+) -> AsyncGenerator[bytes, None]:
+    """
+    将 StreamChunk 流转换为合并后的SSE帧字节流，可直接交给 StreamingResponse。
+
+    Args:
+        stream (AsyncGenerator[StreamChunk, None]): LLM客户端返回的流式响应
+        stream_message_id (int): 前端消息ID
+        flush_bytes (int): 缓冲字节阈值
+        flush_delay (float): 缓冲时限，单位秒
+
+    Yields:
+        bytes: 编码后的SSE帧，最后一帧的 endStream 为 true
+    """
+    encoder = AuditFrameEncoder(stream_message_id)
+    loop = asyncio.get_running_loop()
+    iterator = stream.__aiter__()
+    pending: asyncio.Future | None = None
+
+    buffer: list[str] = []
+    buffer_bytes = 0
+    buffer_think = False
+    deadline = 0.0
+    ended = False
+
+    def flush(end_stream: bool = False) -> bytes:
+        nonlocal buffer_bytes
+        frame = encoder.encode("".join(buffer), buffer_think, end_stream)
+        buffer.clear()
+        buffer_bytes = 0
+        return frame
+
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = max(0.0, deadline - loop.time()) if buffer else None
+            done, _ = await asyncio.wait((pending,), timeout=timeout)
+            if not done:
+                # 上游暂无新数据，缓冲已到时限
+                yield flush()
+                continue
+
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                break
+            except Exception as e:
+                logger.error(f"上游流式响应异常中断: {e}", exc_info=True)
+                if not ended:
+                    # 输出已缓冲的内容并发送结束帧，避免前端一直等待
+                    ended = True
+                    yield flush(end_stream=True)
+                raise
+            finally:
+                pending = None
+
+            if ended:
+                # 结束帧已发出，继续读完上游，使其（如会话历史记录）正常收尾
+                continue
+            if buffer and chunk.is_thinking != buffer_think:
+                yield flush()
+            if chunk.content:
+                if not buffer:
+                    buffer_think = chunk.is_thinking
+                    deadline = loop.time() + flush_delay
+                buffer.append(chunk.content)
+                buffer_bytes += len(chunk.content.encode("utf-8"))
+            if chunk.is_final:
+                ended = True
+                yield flush(end_stream=True)
+                continue
+            if buffer_bytes >= flush_bytes:
+                yield flush()
+
+        if not ended:
+            # 上游未给出结束标记时补发结束帧
+            yield flush(end_stream=True)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        aclose = getattr(stream, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,262 @@
+"""
+会话历史记录存储
+
+内存中以LRU方式缓存活跃会话，每个会话只保留最近的若干轮对话；
+磁盘上每个会话对应一个只追加的日志文件，由后台任务定期压缩；
+压缩时移出的记录追加到 archive 子目录下的归档文件中，完整的对话记录不会丢失。
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.context_logger import SESSION_ID_VAR
+from app.schemas.llmapi.base import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# 会话ID直接用作文件名，只允许安全字符，防止路径穿越
+_SESSION_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+# 归档目录名，位于对话记录目录下，只追加、不压缩
+ARCHIVE_DIR_NAME = "archive"
+
+
+class DialogTurn(NamedTuple):
+    """一轮对话的紧凑表示：时间戳、提问、回答"""
+    ts: float
+    question: str
+    answer: str
+
+
+class _SessionHistory:
+    """
+    单个会话的历史记录。
+    deque 的 maxlen 保证条数限制，时间限制只需从队头弹出过期记录，追加均摊 O(1)。
+    """
+    __slots__ = ("turns", "log_lines")
+
+    def __init__(self, max_turns: int):
+        self.turns: deque[DialogTurn] = deque(maxlen=max_turns)
+        self.log_lines = 0  # 磁盘日志当前行数，用于判断是否需要压缩
+
+    def expire(self, deadline: float) -> None:
+        turns = self.turns
+        while turns and turns[0].ts < deadline:
+            turns.popleft()
+
+
+class SessionHistoryStore:
+    """
+    以 SESSION_ID_VAR 为键的会话历史记录存储。
+    """
+    def __init__(
+        self,
+        dialogs_dir: str | Path = settings.path.dialogs_dir,
+        max_turns: int = settings.constant.recent_dial_max,
+        max_age: int = settings.constant.history_time_max,
+        max_sessions: int = settings.constant.history_session_cache_max,
+        compact_interval: int = settings.constant.history_compact_interval,
+        on_append: Optional[Callable[[DialogTurn], Awaitable[None]]] = None,
+    ):
+        self._dir = Path(dialogs_dir)
+        self._archive_dir = self._dir / ARCHIVE_DIR_NAME
+        self._archive_dir.mkdir(parents=True, exist_ok=True)
+        self._max_turns = max_turns
+        self._max_age = max_age
+        self._max_sessions = max_sessions
+        self._compact_interval = compact_interval
+        self._on_append = on_append  # 新对话回调，如热门知识统计
+        self._sessions: OrderedDict[str, _SessionHistory] = OrderedDict()
+        self._dirty: set[str] = set()
+        # 单线程执行器保证同一文件的追加与压缩按提交顺序执行
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-io")
+        self._compact_task: Optional[asyncio.Task] = None
+        self._callback_tasks: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _resolve_session_id(session_id: Optional[str]) -> Optional[str]:
+        """取指定或当前上下文中的会话ID，为空或含非法字符时返回 None。"""
+        session_id = session_id or SESSION_ID_VAR.get()
+        if not session_id:
+            return None
+        if not _SESSION_ID_PATTERN.fullmatch(session_id):
+            logger.warning(f"会话ID含非法字符，不读写历史记录: {session_id!r}")
+            return None
+        return session_id
+
+    def _log_path(self, session_id: str) -> Path:
+        if not _SESSION_ID_PATTERN.fullmatch(session_id):
+            raise ValueError(f"非法的会话ID: {session_id!r}")
+        return self._dir / f"{session_id}.jsonl"
+
+    async def _run_io(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._io, func, *args)
+
+    # ---------------- 磁盘读写（在IO线程中执行） ----------------
+
+    def _read_log(self, session_id: str) -> tuple[list[DialogTurn], int]:
+        path = self._log_path(session_id)
+        if not path.exists():
+            return [], 0
+        turns = []
+        lines = 0
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    turns.append(DialogTurn(*json.loads(line)))
+                except (json.JSONDecodeError, TypeError):
+                    logger.warning(f"跳过损坏的对话记录: {path}:{lines}")
+        return turns, lines
+
+    def _append_log(self, session_id: str, turn: DialogTurn) -> None:
+        line = json.dumps(turn, ensure_ascii=False, separators=(",", ":"))
+        with self._log_path(session_id).open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def _compact_log(self, session_id: str, keep: int) -> None:
+        """
+        只保留日志末尾 keep 行，其余行先追加到归档文件，再原子替换日志文件。
+        日志按追加顺序写入，内存中保留的记录总是日志的末尾若干行。
+        """
+        path = self._log_path(session_id)
+        if not path.exists():
+            return
+        with path.open("r", encoding="utf-8") as f:
+            lines = f.readlines()
+        split = max(len(lines) - keep, 0)
+        if split == 0:
+            return
+        with (self._archive_dir / path.name).open("a", encoding="utf-8") as f:
+            f.writelines(lines[:split])
+        tmp_path = path.with_suffix(".jsonl.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.writelines(lines[split:])
+        os.replace(tmp_path, path)
+
+    # ---------------- 内存缓存 ----------------
+
+    async def _get_session(self, session_id: str) -> _SessionHistory:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+
+        turns, lines = await self._run_io(self._read_log, session_id)
+        # 等待读取期间可能已被其他协程加载
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = _SessionHistory(self._max_turns)
+            session.turns.extend(turns)
+            session.log_lines = lines
+            self._sessions[session_id] = session
+            if len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def append(self, question: str, answer: str, session_id: Optional[str] = None) -> None:
+        """
+        记录一轮对话。未指定 session_id 时使用当前上下文中的会话ID，均为空或不合法则不记录。
+        """
+        session_id = self._resolve_session_id(session_id)
+        if session_id is None:
+            return
+        now = time.time()
+        session = await self._get_session(session_id)
+        session.expire(now - self._max_age)
+        turn = DialogTurn(now, question, answer)
+        session.turns.append(turn)
+        session.log_lines += 1
+        if session.log_lines > 2 * self._max_turns:
+            self._dirty.add(session_id)
+        await self._run_io(self._append_log, session_id, turn)
+        if self._on_append is not None:
+            # 回调（如热门知识统计）在后台执行，不增加对话响应的延迟
+            task = asyncio.create_task(self._run_callback(turn))
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._callback_tasks.discard)
+
+    async def _run_callback(self, turn: DialogTurn) -> None:
+        try:
+            await self._on_append(turn)
+        except Exception as e:
+            logger.error(f"对话记录回调执行失败: {e}", exc_info=True)
+
+    async def get_history(
+        self,
+        count: int = settings.constant.history_count_max,
+        session_id: Optional[str] = None,
+    ) -> list[ChatMessage]:
+        """
+        获取最近 count 轮未过期的对话，展开为 ChatMessage 列表。
+        只为取用的几轮构建消息对象，不复制整个会话。
+        """
+        session_id = self._resolve_session_id(session_id)
+        if session_id is None or count <= 0:
+            return []
+        session = await self._get_session(session_id)
+        session.expire(time.time() - self._max_age)
+        recent = list(islice(reversed(session.turns), count))
+        messages = []
+        for turn in reversed(recent):
+            messages.append(ChatMessage(role="user", content=turn.question))
+            messages.append(ChatMessage(role="assistant", content=turn.answer))
+        return messages
+
+    # ---------------- 后台压缩 ----------------
+
+    async def compact(self) -> None:
+        """
+        将日志行数过多的会话文件重写为当前保留的记录，移出的记录转入归档文件。
+        """
+        dirty, self._dirty = self._dirty, set()
+        now = time.time()
+        for session_id in dirty:
+            session = self._sessions.get(session_id)
+            if session is None:
+                # 已被LRU淘汰，从磁盘重新加载后压缩
+                session = await self._get_session(session_id)
+            session.expire(now - self._max_age)
+            keep = len(session.turns)
+            session.log_lines = keep
+            try:
+                await self._run_io(self._compact_log, session_id, keep)
+            except OSError as e:
+                logger.error(f"压缩会话记录失败: {session_id}, {e}", exc_info=True)
+                self._dirty.add(session_id)
+
+    async def _compact_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._compact_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"后台压缩会话记录时发生错误: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """启动后台压缩任务，需在事件循环中调用。"""
+        if self._compact_task is None:
+            self._compact_task = asyncio.create_task(self._compact_loop())
+
+    async def close(self) -> None:
+        """停止后台任务，等待未完成的回调，执行最后一次压缩并关闭IO线程。"""
+        if self._compact_task is not None:
+            self._compact_task.cancel()
+            try:
+                await self._compact_task
+            except asyncio.CancelledError:
+                pass
+            self._compact_task = None
+        if self._callback_tasks:
+            await asyncio.gather(*self._callback_tasks)
+        await self.compact()
+        self._io.shutdown(wait=True)